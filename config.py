@@ -2,13 +2,16 @@
 Configuration management for EDMCOverlay
 """
 
+import copy
+import functools
 import json
 import logging
 import os
-from typing import Any, Dict, Optional
+import threading
+from typing import Any, Dict, FrozenSet, Optional, Tuple
 
 # Default configuration
-DEFAULT_CONFIG = {
+DEFAULT_CONFIG: Dict[str, Any] = {
     "server": {
         "address": "127.0.0.1",
         "port": 5010,
@@ -25,45 +28,126 @@ DEFAULT_CONFIG = {
         "allowed_commands": ["exit", "clear", "status"],
     },
     "overlay": {"default_ttl": 4, "default_color": "white", "default_size": "normal"},
+    "service": {"program_path": None},
 }
 
 
+@functools.lru_cache(maxsize=256)
+def _split_path(path: str) -> Tuple[str, ...]:
+    """Split a dotted configuration path into its keys (memoized)"""
+    return tuple(path.split("."))
+
+
 class Config:
     """Configuration manager for EDMCOverlay"""
 
     def __init__(self, config_file: Optional[str] = None):
-        self._config = DEFAULT_CONFIG.copy()
+        self._config: Dict[str, Any] = copy.deepcopy(DEFAULT_CONFIG)
         self._config_file = config_file or os.path.join(
             os.path.dirname(__file__), "edmcoverlay_config.json"
         )
-        self.load()
+        self._loaded = False
+        self._load_failed = False  # The file exists but could not be read
+        self._load_lock = threading.RLock()  # Re-entered by _ensure_loaded -> load
+        # Seed the cached values from the defaults so a reader racing the
+        # first load never finds them missing
+        self._refresh_cache()
+
+    def _ensure_loaded(self) -> None:
+        """Load the configuration file on first access"""
+        if not self._loaded:
+            with self._load_lock:
+                if not self._loaded:
+                    self.load()
 
     def load(self) -> None:
         """Load configuration from file"""
-        if os.path.exists(self._config_file):
+        with self._load_lock:
+            self._load_failed = False
             try:
                 with open(self._config_file, "r", encoding="utf-8") as f:
                     user_config = json.load(f)
-                    self._merge_config(self._config, user_config)
+                self._merge_config(self._config, user_config)
                 logging.info(f"Configuration loaded from {self._config_file}")
+            except FileNotFoundError:
+                pass
             except Exception as e:
+                self._load_failed = True
                 logging.warning(f"Failed to load config from {self._config_file}: {e}")
+            self._refresh_cache()
+            # Only mark loaded once the cache holds the file's values
+            self._loaded = True
+
+    def _refresh_cache(self) -> None:
+        """
+        Materialize frequently read values so properties skip the dict walk.
+        Reads the in-memory dict only, it never triggers a load.
+        """
+        self._server_address: str = self._lookup("server.address")
+        self._server_port: int = self._lookup("server.port")
+        self._server_timeout: float = self._lookup("server.timeout")
+        self._reconnect_attempts: int = self._lookup("server.reconnect_attempts")
+        self._reconnect_delay: float = self._lookup("server.reconnect_delay")
+        self._max_message_length: int = self._lookup("security.max_message_length")
+        self._allowed_commands: FrozenSet[str] = frozenset(
+            self._lookup("security.allowed_commands") or ()
+        )
+        self._default_ttl: int = self._lookup("overlay.default_ttl")
+        self._default_color: str = self._lookup("overlay.default_color")
+        self._default_size: str = self._lookup("overlay.default_size")
 
     def save(self) -> None:
         """Save current configuration to file"""
+        self._ensure_loaded()
+        if self._load_failed:
+            logging.error(f"Not overwriting unreadable config {self._config_file}")
+            return
+        self._write(self._config)
+
+    def save_section(self, section: str) -> None:
+        """
+        Write one top-level section to the config file, keeping the rest of
+        the file as the user wrote it instead of filling in every default
+        """
+        self._ensure_loaded()
+        if self._load_failed:
+            logging.error(f"Not overwriting unreadable config {self._config_file}")
+            return
+
+        try:
+            with open(self._config_file, "r", encoding="utf-8") as f:
+                on_disk = json.load(f)
+        except FileNotFoundError:
+            on_disk = {}
+        except Exception as e:
+            logging.error(f"Not overwriting unreadable config {self._config_file}: {e}")
+            return
+        if not isinstance(on_disk, dict):
+            logging.error(f"Not overwriting unexpected config {self._config_file}")
+            return
+
+        on_disk[section] = copy.deepcopy(self._config.get(section))
+        self._write(on_disk)
+
+    def _write(self, data: Dict[str, Any]) -> None:
+        """Write a configuration dict to the config file"""
         try:
             os.makedirs(os.path.dirname(self._config_file), exist_ok=True)
             with open(self._config_file, "w", encoding="utf-8") as f:
-                json.dump(self._config, f, indent=2)
+                json.dump(data, f, indent=2)
             logging.info(f"Configuration saved to {self._config_file}")
         except Exception as e:
             logging.error(f"Failed to save config to {self._config_file}: {e}")
 
     def _merge_config(self, base: Dict[str, Any], update: Dict[str, Any]) -> None:
-        """Recursively merge configuration dictionaries"""
+        """
+        Merge configuration dictionaries, only recursing where both sides
+        hold a dict; missing sub-trees are assigned directly
+        """
         for key, value in update.items():
-            if key in base and isinstance(base[key], dict) and isinstance(value, dict):
-                self._merge_config(base[key], value)
+            existing = base.get(key)
+            if type(existing) is dict and type(value) is dict:
+                self._merge_config(existing, value)
             else:
                 base[key] = value
 
@@ -72,8 +156,13 @@ class Config:
         Get configuration value using dot notation
         Example: config.get("server.port")
         """
-        keys = path.split(".")
-        value = self._config
+        self._ensure_loaded()
+        return self._lookup(path, default)
+
+    def _lookup(self, path: str, default: Any = None) -> Any:
+        """Walk the in-memory configuration for a dotted path without loading"""
+        keys = _split_path(path)
+        value: Any = self._config
 
         try:
             for key in keys:
@@ -87,7 +176,8 @@ class Config:
         Set configuration value using dot notation
         Example: config.set("server.port", 5011)
         """
-        keys = path.split(".")
+        self._ensure_loaded()
+        keys = _split_path(path)
         config = self._config
 
         # Navigate to the parent of the target key
@@ -98,46 +188,57 @@ class Config:
 
         # Set the value
         config[keys[-1]] = value
+        self._refresh_cache()
 
     @property
     def server_address(self) -> str:
-        return self.get("server.address")
+        self._ensure_loaded()
+        return self._server_address
 
     @property
     def server_port(self) -> int:
-        return self.get("server.port")
+        self._ensure_loaded()
+        return self._server_port
 
     @property
     def server_timeout(self) -> float:
-        return self.get("server.timeout")
+        self._ensure_loaded()
+        return self._server_timeout
 
     @property
     def reconnect_attempts(self) -> int:
-        return self.get("server.reconnect_attempts")
+        self._ensure_loaded()
+        return self._reconnect_attempts
 
     @property
     def reconnect_delay(self) -> float:
-        return self.get("server.reconnect_delay")
+        self._ensure_loaded()
+        return self._reconnect_delay
 
     @property
     def max_message_length(self) -> int:
-        return self.get("security.max_message_length")
+        self._ensure_loaded()
+        return self._max_message_length
 
     @property
-    def allowed_commands(self) -> list:
-        return self.get("security.allowed_commands")
+    def allowed_commands(self) -> FrozenSet[str]:
+        self._ensure_loaded()
+        return self._allowed_commands
 
     @property
     def default_ttl(self) -> int:
-        return self.get("overlay.default_ttl")
+        self._ensure_loaded()
+        return self._default_ttl
 
     @property
     def default_color(self) -> str:
-        return self.get("overlay.default_color")
+        self._ensure_loaded()
+        return self._default_color
 
     @property
     def default_size(self) -> str:
-        return self.get("overlay.default_size")
+        self._ensure_loaded()
+        return self._default_size
 
 
 # Global configuration instance
@@ -0,0 +1,69 @@
+"""
+Shared pytest fixtures for the EDMCOverlay test suites
+"""
+
+import sys
+from pathlib import Path
+
+import pytest
+
+# Make the plugin modules importable from every test module, once per session
+_ROOT = str(Path(__file__).parent)
+if _ROOT not in sys.path:
+    sys.path.insert(0, _ROOT)
+
+# pytest cache key recording which client the last run was able to import
+USING_IMPROVED_CACHE_KEY = "edmcoverlay/using_improved"
+
+
+def pytest_report_header(config):
+    """Show which client the previous run imported, from the pytest cache"""
+    cache = getattr(config, "cache", None)
+    previous = cache.get(USING_IMPROVED_CACHE_KEY, None) if cache is not None else None
+    if previous is not None:
+        return "edmcoverlay client on last run: %s" % (
+            "enhanced" if previous else "legacy"
+        )
+    return None
+
+
+@pytest.fixture(scope="session")
+def using_improved(pytestconfig):
+    """Whether the enhanced client is importable, probed once per session"""
+    try:
+        import edmcoverlay_improved  # noqa: F401
+
+        result = True
+    except ImportError:
+        result = False
+
+    # The cache provider is absent under -p no:cacheprovider
+    cache = getattr(pytestconfig, "cache", None)
+    if cache is not None:
+        cache.set(USING_IMPROVED_CACHE_KEY, result)
+    return result
+
+
+@pytest.fixture(scope="session")
+def overlay(using_improved):
+    """One Overlay shared by every test in the session (per xdist worker)"""
+    if using_improved:
+        from edmcoverlay_improved import Overlay
+    else:
+        from edmcoverlay import Overlay
+
+    return Overlay()
+
+
+@pytest.fixture(scope="module")
+def sample_message():
+    """A valid overlay text message, built once per module (do not mutate)"""
+    return {
+        "command": "send_message",
+        "id": "test",
+        "text": "Hello Test",
+        "color": "green",
+        "x": 10,
+        "y": 10,
+        "ttl": 5,
+    }
@@ -4,6 +4,7 @@ Enhanced Client library for EDMCOverlay with improved error handling and securit
 
 from __future__ import print_function
 
+import importlib.util
 import json
 import logging
 import os
@@ -13,7 +14,10 @@ import sys
 import threading
 import time
 from contextlib import contextmanager
-from typing import Any, Dict, List, Optional
+from typing import TYPE_CHECKING, Any, Dict, List, Optional, Tuple, cast
+
+if TYPE_CHECKING:
+    from config import Config
 
 # Configuration
 DEFAULT_SERVER_ADDRESS = "127.0.0.1"
@@ -21,10 +25,39 @@ DEFAULT_SERVER_PORT = 5010
 CONNECT_TIMEOUT = 5.0
 RECONNECT_ATTEMPTS = 3
 RECONNECT_DELAY = 1.0
+SERVICE_ALIVE_TTL = 30.0  # Seconds a successful liveness probe stays valid
+MAX_MESSAGE_SIZE = 10240  # Encoded bytes per message, matches the server limit
 
 HERE = os.path.dirname(os.path.abspath(__file__))
 PROG = "EDMCOverlay.exe"
 
+# Whitelist of allowed message keys and their types
+_ALLOWED_FIELDS: Dict[str, Tuple[type, ...]] = {
+    "id": (str, int),
+    "text": (str,),
+    "color": (str,),
+    "size": (str,),
+    "x": (int, float),
+    "y": (int, float),
+    "ttl": (int, float),
+    "shape": (str,),
+    "fill": (str,),
+    "w": (int, float),
+    "h": (int, float),
+    "command": (str,),
+    "vector": (list,),  # Points of a "vect" shape, passed through as-is
+    "anchor": (str,),
+}
+_STRING_FIELDS = frozenset(
+    {"text", "color", "size", "shape", "fill", "command", "anchor"}
+)
+
+# Pre-built outbound message layouts, copied and filled in per send
+_MSG_TEMPLATE = dict.fromkeys(("id", "color", "text", "size", "x", "y", "ttl"))
+_SHAPE_TEMPLATE = dict.fromkeys(
+    ("id", "shape", "color", "fill", "x", "y", "w", "h", "ttl")
+)
+
 # Setup logging
 logging.basicConfig(level=logging.INFO)
 logger = logging.getLogger(__name__)
@@ -47,8 +80,55 @@ except ImportError:
     monitor = None
 
 
-class OverlayConnectionError(Exception):
-    """Exception raised when overlay connection fails"""
+def _load_plugin_config() -> Optional["Config"]:
+    """
+    Load the plugin's own config.py by path. Inside EDMC the top-level name
+    ``config`` is EDMC's config package, so a plain import would return that.
+    :return: The plugin configuration, or None if it cannot be loaded
+    """
+    name = "edmcoverlay_config"
+    module = sys.modules.get(name)
+    if module is None:
+        spec = importlib.util.spec_from_file_location(
+            name, os.path.join(HERE, "config.py")
+        )
+        if spec is None or spec.loader is None:
+            return None
+        module = importlib.util.module_from_spec(spec)
+        try:
+            spec.loader.exec_module(module)
+        except (ImportError, OSError) as e:
+            logger.warning("Could not load plugin config: %s", e)
+            return None
+        sys.modules[name] = module
+
+    plugin_config = getattr(module, "config", None)
+    if not isinstance(plugin_config, module.Config):
+        return None
+    return cast("Config", plugin_config)
+
+
+config = _load_plugin_config()
+
+
+def _json_dumps(obj: Any) -> bytes:
+    """Serialize a message to UTF-8 JSON bytes (stdlib fallback)"""
+    return json.dumps(obj, ensure_ascii=True).encode("utf-8")
+
+
+# Prefer orjson for message encoding, it emits UTF-8 bytes directly
+try:
+    from orjson import dumps as _dumps
+except ImportError:
+    _dumps = _json_dumps  # type: ignore[assignment, unused-ignore]
+
+
+class OverlayConnectionError(ConnectionError):
+    """
+    Exception raised when overlay connection fails.
+    Subclasses ConnectionError so code written against the legacy client,
+    which raised ConnectionError, keeps catching it.
+    """
 
     pass
 
@@ -66,6 +146,7 @@ class ServiceManager:
         self._service: Optional[subprocess.Popen] = None
         self._lock = threading.Lock()
         self._program_path: Optional[str] = None
+        self._last_alive_ts = float("-inf")  # monotonic() may be < TTL at boot
 
     def find_server_program(self) -> Optional[str]:
         """
@@ -75,6 +156,12 @@ class ServiceManager:
         if self._program_path is not None:
             return self._program_path
 
+        # Try the location remembered from a previous session first
+        cached: Optional[str] = config.get("service.program_path") if config else None
+        if cached and os.path.isfile(cached):
+            self._program_path = cached
+            return cached
+
         locations = [
             os.path.join(HERE, PROG),
             os.path.join(HERE, "EDMCOverlay", PROG),
@@ -86,6 +173,9 @@ class ServiceManager:
             if os.path.isfile(path):
                 trace(f"exe found at {path}")
                 self._program_path = path
+                if config:
+                    config.set("service.program_path", path)
+                    config.save_section("service")
                 return path
 
         return None
@@ -97,21 +187,32 @@ class ServiceManager:
         return bool(monitor.monitor.game_running())
 
     def is_service_alive(self) -> bool:
-        """Check if the overlay service is responding"""
+        """Check if the overlay service is accepting connections"""
         try:
-            test_overlay = Overlay()
-            test_overlay.connect()
-            test_overlay.send_message("test", ".", "black", 0, 0, 1)
-            test_overlay.disconnect()
-            return True
-        except Exception:
+            probe = socket.create_connection(
+                (DEFAULT_SERVER_ADDRESS, DEFAULT_SERVER_PORT), timeout=CONNECT_TIMEOUT
+            )
+            probe.close()
+        except OSError:
+            # A failed probe invalidates the last success so ensure_service acts
+            self._last_alive_ts = float("-inf")
             return False
 
+        self._last_alive_ts = time.monotonic()
+        return True
+
+    def mark_unreachable(self) -> None:
+        """Forget the last successful liveness probe so the next check re-probes"""
+        self._last_alive_ts = float("-inf")
+
     def ensure_service(self, args: Optional[List[str]] = None) -> None:
         """
         Start the overlay service program with proper error handling
         :param args: Additional arguments for the service
         """
+        if time.monotonic() - self._last_alive_ts < SERVICE_ALIVE_TTL:
+            return
+
         if args is None:
             args = []
 
@@ -136,11 +237,13 @@ class ServiceManager:
                 if self.check_game_running():
                     trace(f"Starting {program} with {args}")
                     prog_args = [program] + args
+                    # The server logs every message to stderr and keeps its own
+                    # log file, so discard the output rather than buffer it
                     self._service = subprocess.Popen(
                         prog_args,
                         cwd=exedir,
-                        stdout=subprocess.PIPE,
-                        stderr=subprocess.PIPE,
+                        stdout=subprocess.DEVNULL,
+                        stderr=subprocess.DEVNULL,
                     )
 
                     # Wait a bit for service to start
@@ -148,15 +251,9 @@ class ServiceManager:
 
                     # Check if service started successfully
                     if self._service.poll() is not None:
-                        stdout, stderr = self._service.communicate()
-                        error_msg = (
+                        raise OverlayServiceError(
                             f"{program} exited with code {self._service.returncode}"
                         )
-                        if stderr:
-                            error_msg += (
-                                f", stderr: {stderr.decode('utf-8', errors='ignore')}"
-                            )
-                        raise OverlayServiceError(error_msg)
 
             except Exception as err:
                 if self.check_game_running():
@@ -176,6 +273,7 @@ class ServiceManager:
                     logger.warning(f"Error stopping service: {e}")
                 finally:
                     self._service = None
+                    self._last_alive_ts = float("-inf")
 
 
 # Global service manager instance
@@ -198,13 +296,15 @@ class Overlay:
         self.args = args or []
         self.connection: Optional[socket.socket] = None
         self._lock = threading.Lock()
+        # Batches are per thread: plugins share ``internal`` across threads
+        self._batch_state = threading.local()
 
     @contextmanager
     def _connection_context(self):
         """Context manager for connection handling"""
+        if self.connection is None:
+            self.connect()
         try:
-            if not self.connection:
-                self.connect()
             yield self.connection
         except Exception as e:
             self.disconnect()
@@ -214,40 +314,67 @@ class Overlay:
         """
         Open the connection with timeout and retry logic
         """
+        # Fast path: only take the lock when a connection has to be created
+        if self.connection is not None:
+            return
+
         with self._lock:
-            if self.connection:
+            # Another thread may have connected while we waited for the lock
+            if self.connection is None:
+                self._open_connection()
+
+    def _open_connection(self) -> None:
+        """Create the socket, retrying on failure. Called with the lock held."""
+        for attempt in range(RECONNECT_ATTEMPTS):
+            try:
+                connection = socket.socket(socket.AF_INET, socket.SOCK_STREAM)
+                connection.settimeout(CONNECT_TIMEOUT)
+                connection.setsockopt(socket.IPPROTO_TCP, socket.TCP_NODELAY, 1)
+                connection.connect((self.server, self.port))
+                self.connection = connection
+                logger.debug(
+                    "Connected to overlay server at %s:%s", self.server, self.port
+                )
                 return
 
-            for attempt in range(RECONNECT_ATTEMPTS):
-                try:
-                    connection = socket.socket(socket.AF_INET, socket.SOCK_STREAM)
-                    connection.settimeout(CONNECT_TIMEOUT)
-                    connection.connect((self.server, self.port))
-                    self.connection = connection
-                    logger.debug(
-                        f"Connected to overlay server at {self.server}:{self.port}"
+            except (socket.timeout, ConnectionRefusedError, OSError) as e:
+                if attempt < RECONNECT_ATTEMPTS - 1:
+                    logger.warning(
+                        "Connection attempt %d failed: %s, retrying...",
+                        attempt + 1,
+                        e,
+                    )
+                    time.sleep(RECONNECT_DELAY)
+                else:
+                    raise OverlayConnectionError(
+                        f"Failed to connect after {RECONNECT_ATTEMPTS} attempts: {e}"
                     )
-                    return
 
-                except (socket.timeout, ConnectionRefusedError, OSError) as e:
-                    if attempt < RECONNECT_ATTEMPTS - 1:
-                        logger.warning(
-                            f"Connection attempt {attempt + 1} failed: {e}, retrying..."
-                        )
-                        time.sleep(RECONNECT_DELAY)
-                    else:
-                        raise OverlayConnectionError(
-                            f"Failed to connect after {RECONNECT_ATTEMPTS} attempts: {e}"
-                        )
+    def _ensure_connected(self) -> None:
+        """
+        Connect to the server, starting the service only if the connection fails
+        """
+        if self.connection is not None:
+            return
+
+        try:
+            self.connect()
+        except OverlayConnectionError:
+            _service_manager.mark_unreachable()
+            _service_manager.ensure_service(self.args)
+            self.connect()
 
     def disconnect(self) -> None:
         """Close the connection"""
+        if self.connection is None:
+            return
+
         with self._lock:
             if self.connection:
                 try:
                     self.connection.close()
                 except Exception as e:
-                    logger.warning(f"Error closing connection: {e}")
+                    logger.warning("Error closing connection: %s", e)
                 finally:
                     self.connection = None
 
@@ -259,26 +386,81 @@ class Overlay:
         if not isinstance(msg, dict):
             raise ValueError("Message must be a dictionary")
 
-        try:
-            with self._connection_context() as conn:
-                # Validate and sanitize the message
-                sanitized_msg = self._sanitize_message(msg)
-                data = json.dumps(sanitized_msg, ensure_ascii=True)
+        # Validate and sanitize the message
+        sanitized_msg = self._sanitize_message(msg)
+        data = _dumps(sanitized_msg)
+        if len(data) > MAX_MESSAGE_SIZE:
+            raise ValueError(
+                f"Message too large: {len(data)} bytes (max {MAX_MESSAGE_SIZE})"
+            )
+
+        batch: Optional[List[bytes]] = getattr(self._batch_state, "queue", None)
+        if batch is not None:
+            batch.append(data)
+            return
 
-                if sys.version_info.major >= 3:
-                    conn.send(data.encode("utf-8"))
-                    conn.send(b"\n")
-                else:
-                    conn.send(data)
-                    conn.send("\n")
+        self._write(data + b"\n")
+        if logger.isEnabledFor(logging.DEBUG):
+            logger.debug("Sent message: %s", sanitized_msg)
+
+    def begin_batch(self) -> None:
+        """
+        Queue this thread's messages passed to send_raw until end_batch() is
+        called. Calls nest: only the outermost end_batch() sends the queue.
+        """
+        state = self._batch_state
+        if getattr(state, "queue", None) is None:
+            state.queue = []
+            state.depth = 0
+        state.depth += 1
+
+    def end_batch(self) -> None:
+        """
+        Stop batching and send all queued messages in a single write
+        """
+        state = self._batch_state
+        if getattr(state, "queue", None) is None:
+            return
+        state.depth -= 1
+        if state.depth > 0:
+            return
 
-                logger.debug(f"Sent message: {sanitized_msg}")
+        batch, state.queue = state.queue, None
+        if batch:
+            self._write(b"\n".join(batch) + b"\n")
+            logger.debug("Sent batch of %d messages", len(batch))
+
+    @contextmanager
+    def batch(self):
+        """
+        Context manager that coalesces all messages this thread sends inside it
+        into one write. A nested batch joins the outer one. Messages queued by a
+        block that raises are discarded.
+        """
+        self.begin_batch()
+        start = len(self._batch_state.queue)
+        try:
+            yield self
+        except BaseException:
+            del self._batch_state.queue[start:]
+            self.end_batch()
+            raise
+        self.end_batch()
+
+    def _write(self, payload: bytes) -> None:
+        """
+        Write newline-delimited JSON to the server
+        :param payload: Encoded message(s), each terminated by a newline
+        """
+        try:
+            with self._connection_context() as conn:
+                conn.sendall(payload)
 
         except (BrokenPipeError, ConnectionResetError):
             self.disconnect()
             raise OverlayConnectionError("Connection lost")
         except Exception as e:
-            logger.error(f"Failed to send message: {e}")
+            logger.error("Failed to send message: %s", e)
             raise
 
     def _sanitize_message(self, msg: Dict[str, Any]) -> Dict[str, Any]:
@@ -287,38 +469,21 @@ class Overlay:
         :param msg: Original message
         :return: Sanitized message
         """
-        sanitized = {}
-
-        # Whitelist of allowed keys and their types
-        allowed_fields = {
-            "id": (str, int),
-            "text": str,
-            "color": str,
-            "size": str,
-            "x": (int, float),
-            "y": (int, float),
-            "ttl": (int, float),
-            "shape": str,
-            "fill": str,
-            "w": (int, float),
-            "h": (int, float),
-            "command": str,
-        }
+        sanitized: Dict[str, Any] = {}
+        max_length = config.max_message_length if config else 1000
 
         for key, value in msg.items():
-            if key in allowed_fields:
-                expected_types = allowed_fields[key]
-                if not isinstance(expected_types, tuple):
-                    expected_types = (expected_types,)
-
-                if isinstance(value, expected_types):
-                    # Additional validation for specific fields
-                    if key in ["text", "color", "size", "shape", "fill", "command"]:
-                        # Limit string length and remove potentially dangerous characters
-                        if isinstance(value, str):
-                            sanitized[key] = str(value)[:1000]  # Limit length
-                    else:
-                        sanitized[key] = value
+            expected_types = _ALLOWED_FIELDS.get(key)
+            if expected_types is None:
+                continue
+
+            if isinstance(value, expected_types):
+                # Additional validation for specific fields
+                if key in _STRING_FIELDS:
+                    # Limit string length and remove potentially dangerous characters
+                    sanitized[key] = str(value)[:max_length]  # Limit length
+                else:
+                    sanitized[key] = value
 
         return sanitized
 
@@ -335,19 +500,16 @@ class Overlay:
         """
         Send a text message to the overlay
         """
-        if not self.connection:
-            _service_manager.ensure_service(self.args)
-            self.connect()
-
-        msg = {
-            "id": msgid,
-            "color": color,
-            "text": text,
-            "size": size,
-            "x": x,
-            "y": y,
-            "ttl": ttl,
-        }
+        self._ensure_connected()
+
+        msg = _MSG_TEMPLATE.copy()
+        msg["id"] = msgid
+        msg["color"] = color
+        msg["text"] = text
+        msg["size"] = size
+        msg["x"] = x
+        msg["y"] = y
+        msg["ttl"] = ttl
         self.send_raw(msg)
 
     def send_shape(
@@ -365,30 +527,25 @@ class Overlay:
         """
         Send a shape to the overlay
         """
-        if not self.connection:
-            _service_manager.ensure_service(self.args)
-            self.connect()
-
-        msg = {
-            "id": shapeid,
-            "shape": shape,
-            "color": color,
-            "fill": fill,
-            "x": x,
-            "y": y,
-            "w": w,
-            "h": h,
-            "ttl": ttl,
-        }
+        self._ensure_connected()
+
+        msg = _SHAPE_TEMPLATE.copy()
+        msg["id"] = shapeid
+        msg["shape"] = shape
+        msg["color"] = color
+        msg["fill"] = fill
+        msg["x"] = x
+        msg["y"] = y
+        msg["w"] = w
+        msg["h"] = h
+        msg["ttl"] = ttl
         self.send_raw(msg)
 
     def send_command(self, command: str) -> None:
         """
         Send a command to the overlay server
         """
-        if not self.connection:
-            _service_manager.ensure_service(self.args)
-            self.connect()
+        self._ensure_connected()
 
         msg = {"command": command}
         self.send_raw(msg)
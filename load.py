@@ -4,35 +4,31 @@ Plugin for EDMCOverlay - Enhanced Version
 
 import logging
 import os
+import time
 from typing import Optional
 
-# Try to use the improved version first, fallback to legacy if needed
-try:
-    from edmcoverlay import (  # Keep legacy service management for compatibility
-        ensure_service,
-    )
-    from edmcoverlay_improved import (
-        Overlay,
-        OverlayConnectionError,
-        ServiceManager,
-        trace,
-    )
+# The legacy edmcoverlay module is a shim over edmcoverlay_improved, so the
+# enhanced client is always available. Its ensure_service keeps the legacy
+# contract of tracing failures instead of raising, which the fallbacks rely on.
+from edmcoverlay import ensure_service
+from edmcoverlay_improved import (
+    Overlay,
+    OverlayConnectionError,
+    ServiceManager,
+    trace,
+)
 
-    USING_IMPROVED = True
-except ImportError:
-    from edmcoverlay import Overlay, ensure_service, trace  # type: ignore
-
-    USING_IMPROVED = False
+USING_IMPROVED = True
 
 HERE = os.path.dirname(os.path.abspath(__file__))
 PLUGDIR = os.path.dirname(HERE)
 
-# Initialize client with improved version if available
-if USING_IMPROVED:
-    service_manager = ServiceManager()
-    client: Optional[Overlay] = None
-else:
-    client = Overlay()
+# Journal events arrive in bursts, only probe the service this often (seconds)
+ALIVE_CHECK_INTERVAL = 5.0
+_last_alive_check = float("-inf")
+
+service_manager = ServiceManager()
+client: Optional[Overlay] = None
 
 
 def plugin_start3(plugin_dir):
@@ -47,53 +43,52 @@ def plugin_start():
     """
     global client
 
-    if USING_IMPROVED:
-        # Use improved version with context management
-        try:
-            service_manager.ensure_service()
-            client = Overlay()
+    # Use improved version with context management
+    try:
+        service_manager.ensure_service()
+        client = Overlay()
 
-            with client:
-                client.send_message(
-                    "edmcintro", trace("EDMC Ready (Enhanced)"), "green", 30, 165, ttl=6
-                )
-
-        except OverlayConnectionError as err:
-            print(f"Enhanced overlay connection failed: {err}")
-            # Fallback to legacy service management
-            ensure_service()
-            client = Overlay()
-            try:
-                client.send_message(
-                    "edmcintro",
-                    trace("EDMC Ready (Fallback)"),
-                    "yellow",
-                    30,
-                    165,
-                    ttl=6,
-                )
-            except Exception as fallback_err:
-                print(f"Fallback also failed: {fallback_err}")
-        except Exception as err:
-            print(f"Unexpected error in enhanced plugin_start(): {err}")
-            # Complete fallback
-            ensure_service()
-            client = Overlay()
-    else:
-        # Legacy version
+        with client:
+            client.send_message(
+                "edmcintro", trace("EDMC Ready (Enhanced)"), "green", 30, 165, ttl=6
+            )
+
+    except OverlayConnectionError as err:
+        print(f"Enhanced overlay connection failed: {err}")
+        # Fallback to legacy service management
         ensure_service()
+        client = Overlay()
         try:
-            if client:
-                client.send_message(
-                    "edmcintro", trace("EDMC Ready"), "yellow", 30, 165, ttl=6
-                )
-        except Exception as err:
-            print("Error sending message in plugin_start() : {}".format(err))
+            client.send_message(
+                "edmcintro",
+                trace("EDMC Ready (Fallback)"),
+                "yellow",
+                30,
+                165,
+                ttl=6,
+            )
+        except Exception as fallback_err:
+            print(f"Fallback also failed: {fallback_err}")
+    except Exception as err:
+        print(f"Unexpected error in enhanced plugin_start(): {err}")
+        # Complete fallback
+        ensure_service()
+        client = Overlay()
 
     return "EDMCOverlay"
 
 
-def journal_entry(cmdr, is_beta, system, station, entry, state):
+def journal_entry(
+    cmdr,
+    is_beta,
+    system,
+    station,
+    entry,
+    state,
+    _monotonic=time.monotonic,
+    _service_manager=service_manager,
+    _ensure_service=ensure_service,
+):
     """
     Make sure the service is up and running
     Enhanced version with better service monitoring
@@ -105,18 +100,23 @@ def journal_entry(cmdr, is_beta, system, station, entry, state):
     :param state: Current state
     :return:
     """
-    if USING_IMPROVED:
-        # Use improved service monitoring
-        if service_manager and not service_manager.is_service_alive():
-            try:
-                service_manager.ensure_service()
-            except Exception as err:
-                print(f"Failed to restart service: {err}")
-                # Fallback to legacy
-                ensure_service()
-    else:
-        # Legacy version
-        ensure_service()
+    # EDMC calls this for every journal line, the trailing defaults bind the
+    # collaborators as locals instead of module global lookups
+    global _last_alive_check
+
+    now = _monotonic()
+    if now - _last_alive_check < ALIVE_CHECK_INTERVAL:
+        return
+    _last_alive_check = now
+
+    # Use improved service monitoring
+    if not _service_manager.is_service_alive():
+        try:
+            _service_manager.ensure_service()
+        except Exception as err:
+            print(f"Failed to restart service: {err}")
+            # Fallback to legacy
+            _ensure_service()
 
 
 def plugin_stop():
@@ -127,27 +127,26 @@ def plugin_stop():
     """
     global client
 
-    if USING_IMPROVED:
-        # Use improved cleanup
-        try:
-            if client:
-                # Send exit command with context manager
-                with client:
-                    client.send_raw({"command": "exit"})
-                client = None
+    # Use improved cleanup
+    try:
+        if client:
+            # Send exit command with context manager
+            with client:
+                client.send_raw({"command": "exit"})
+            client = None
 
-            if service_manager:
-                service_manager.stop_service()
+        service_manager.stop_service()
 
-        except Exception as err:
-            print(f"Error during enhanced cleanup: {err}")
-    else:
-        # Legacy cleanup
-        try:
-            if client:
-                client.send_raw({"command": "exit"})
-        except Exception as err:
-            print(f"Error during legacy cleanup: {err}")
+    except Exception as err:
+        print(f"Error during enhanced cleanup: {err}")
+
+
+# The implementation is fixed at import time, only the client state is live
+_CLIENT_INFO = {
+    "using_improved": USING_IMPROVED,
+    "client_type": "Enhanced",
+    "has_service_manager": True,
+}
 
 
 def get_client_info():
@@ -155,9 +154,4 @@ def get_client_info():
     Get information about the current client implementation
     :return: Dict with client info
     """
-    return {
-        "using_improved": USING_IMPROVED,
-        "client_type": "Enhanced" if USING_IMPROVED else "Legacy",
-        "has_service_manager": USING_IMPROVED and service_manager is not None,
-        "client_active": client is not None,
-    }
+    return {**_CLIENT_INFO, "client_active": client is not None}
@@ -2,17 +2,150 @@
 Performance monitoring and metrics collection for EDMCOverlay
 """
 
+import bisect
+import functools
 import json
 import logging
 import os
+import queue
+import sys
 import threading
 import time
-from collections import defaultdict, deque
+from array import array
+from collections import Counter, deque, namedtuple
 from datetime import datetime, timedelta
-from typing import Any, Dict, List, Optional
+from itertools import islice
+from operator import attrgetter
+from typing import Any, Dict, List, Optional, Tuple
+
+try:
+    import psutil
+except ImportError:
+    psutil = None
 
 logger = logging.getLogger(__name__)
 
+# Event timestamps are monotonic seconds, datetimes are only built for reports
+_now = time.monotonic
+# Operation durations are measured in integer nanoseconds and reported in seconds
+_perf_ns = time.perf_counter_ns
+
+# Compact per-event records, messages are stored column-wise and rebuilt on demand
+MsgRecord = namedtuple("MsgRecord", "ts type duration")
+ConnRecord = namedtuple("ConnRecord", "ts event duration")
+
+
+def _json_dumps_indented(obj: Any) -> bytes:
+    """Serialize a report to indented UTF-8 JSON bytes (stdlib fallback)"""
+    return json.dumps(obj, indent=2, ensure_ascii=False).encode("utf-8")
+
+
+# Prefer orjson for exports, it pretty-prints straight to UTF-8 bytes
+try:
+    import orjson
+
+    def _dumps_indented(obj: Any) -> bytes:
+        """Serialize a report to indented UTF-8 JSON bytes"""
+        return orjson.dumps(obj, option=orjson.OPT_INDENT_2)
+
+except ImportError:
+    _dumps_indented = _json_dumps_indented
+
+
+# Memory readings are reused for this many seconds before sampling again
+MEMORY_SAMPLE_TTL = 1.0
+
+# Windowed message rates come from per-second counters covering this many seconds
+RATE_WINDOW_SECONDS = 300
+_EMPTY_BUCKETS = array("I", [0]) * RATE_WINDOW_SECONDS
+
+
+def _bucket_rate(counts: List[int], now: float) -> float:
+    """Messages per second from per-second counts, newest second first"""
+    total = sum(counts)
+
+    if total == 0:
+        return 0.0
+
+    # Measure from the oldest second that saw a message, as the old
+    # timestamp scan did
+    oldest_age = max(age for age, count in enumerate(counts) if count)
+    time_span = now - (int(now) - oldest_age)
+    return total / max(time_span, 1.0)
+
+
+def _error_rate(errors: int, messages: int) -> float:
+    """Errors as a percentage of the messages sent in the same window"""
+    if errors == 0:
+        return 0.0
+    return errors / max(messages, 1) * 100.0
+
+
+def _connection_stats(
+    events: List[ConnRecord], total_connections: int, current_connections: int
+) -> Dict[str, Any]:
+    """Summarize a snapshot of connection events"""
+    connects = disconnects = 0
+    connect_time_sum = 0.0
+    connect_time_count = 0
+    # Single pass, no intermediate lists
+    for _ts, event, duration in events:
+        if event == "connect":
+            connects += 1
+            if duration > 0:
+                connect_time_sum += duration
+                connect_time_count += 1
+        elif event == "disconnect":
+            disconnects += 1
+
+    return {
+        "total_connections": total_connections,
+        "current_connections": current_connections,
+        "average_connect_time": (
+            connect_time_sum / connect_time_count if connect_time_count else 0.0
+        ),
+        "connect_events": connects,
+        "disconnect_events": disconnects,
+    }
+
+
+# Background exports are written by one daemon thread fed from a bounded queue
+EXPORT_QUEUE_SIZE = 8
+_export_queue: "queue.Queue[Tuple[str, bytes]]" = queue.Queue(EXPORT_QUEUE_SIZE)
+_export_writer: Optional[threading.Thread] = None
+_export_writer_lock = threading.Lock()
+
+
+def _write_export(filepath: str, payload: bytes):
+    """Write a serialized export to disk"""
+    with open(filepath, "wb") as f:
+        f.write(payload)
+
+    logger.info("Metrics exported to %s", filepath)
+
+
+def _export_writer_loop():
+    """Drain the export queue, one file at a time"""
+    while True:
+        filepath, payload = _export_queue.get()
+        try:
+            _write_export(filepath, payload)
+        except Exception as e:
+            logger.error("Failed to export metrics: %s", e)
+        finally:
+            _export_queue.task_done()
+
+
+def _start_export_writer():
+    """Start the background export writer if it is not running yet"""
+    global _export_writer
+    with _export_writer_lock:
+        if _export_writer is None:
+            _export_writer = threading.Thread(
+                target=_export_writer_loop, name="EDMCOverlayMetricsWriter", daemon=True
+            )
+            _export_writer.start()
+
 
 class PerformanceMetrics:
     """Collects and tracks performance metrics for EDMCOverlay"""
@@ -22,40 +155,84 @@ class PerformanceMetrics:
         self.lock = threading.Lock()
 
         # Metrics storage
-        self.message_times = deque(maxlen=max_history)
+        # Message history is a ring buffer of parallel arrays: no per-record objects
+        self._ts = array("d", [0.0]) * max_history
+        self._dur = array("d", [0.0]) * max_history
+        self._type_idx = array("I", [0]) * max_history
+        self._type_table: List[str] = []  # Interned message type names
+        self._type_ids: Dict[str, int] = {}
+        self._head = 0  # Next slot to write
+        self._count = 0  # Number of live records
+        # Running totals of the positive durations in the live window, overall
+        # and per type id, kept in step with inserts and evictions
+        self._dur_sum = 0.0
+        self._dur_count = 0
+        self._type_dur_sum: List[float] = []
+        self._type_dur_count: List[int] = []
+        # Rings of per-second message and error counts, the bucket for second s
+        # is s % size in both
+        self._rate_buckets = array("I", _EMPTY_BUCKETS)
+        self._error_buckets = array("I", _EMPTY_BUCKETS)
+        self._bucket_sec = int(_now())  # Newest second the buckets describe
         self.connection_times = deque(maxlen=max_history)
-        self.error_counts = defaultdict(int)
-        self.message_counts = defaultdict(int)
+        self.error_counts: Counter[str] = Counter()
+        self.message_counts: Counter[str] = Counter()
 
         # Current session stats
         self.session_start = datetime.utcnow()
+        self._session_start_ts = _now()
         self.total_messages_sent = 0
         self.total_errors = 0
         self.total_connections = 0
         self.current_connections = 0
 
         # Performance tracking
-        self.last_cleanup = datetime.utcnow()
-        self.cleanup_interval = timedelta(minutes=5)
+        self.last_cleanup = _now()
+        self.cleanup_interval = 5 * 60.0  # seconds
+        self._process = psutil.Process(os.getpid()) if psutil else None
+        self._memory_sample = (0.0, float("-inf"))  # (value_mb, taken at)
 
     def record_message_sent(self, message_type: str = "unknown", duration: float = 0.0):
         """Record a message being sent"""
+        now = _now()
+        second = int(now)
         with self.lock:
-            now = datetime.utcnow()
-            self.message_times.append(
-                {"timestamp": now, "type": message_type, "duration": duration}
-            )
+            type_id = self._type_ids.get(message_type)
+            if type_id is None:
+                type_id = self._intern_type(message_type)
+
+            # Hot path: bind the ring state to locals once
+            max_history = self.max_history
+            head = self._head
+            if self._count == max_history:
+                self._evict(head)
+            else:
+                self._count += 1
+            self._ts[head] = now
+            self._dur[head] = duration
+            self._type_idx[head] = type_id
+            self._head = head + 1 if head + 1 < max_history else 0
+            if duration > 0:
+                self._dur_sum += duration
+                self._dur_count += 1
+                self._type_dur_sum[type_id] += duration
+                self._type_dur_count[type_id] += 1
+
+            if second > self._bucket_sec:
+                self._advance_buckets(second)
+            self._rate_buckets[second % RATE_WINDOW_SECONDS] += 1
+
             self.message_counts[message_type] += 1
             self.total_messages_sent += 1
-            self._cleanup_if_needed()
+            if now - self.last_cleanup > self.cleanup_interval:
+                self._cleanup_old_data()
+                self.last_cleanup = now
 
     def record_connection_event(self, event_type: str, duration: float = 0.0):
         """Record connection events (connect, disconnect, error)"""
+        record = ConnRecord(_now(), event_type, duration)
         with self.lock:
-            now = datetime.utcnow()
-            self.connection_times.append(
-                {"timestamp": now, "event": event_type, "duration": duration}
-            )
+            self.connection_times.append(record)
 
             if event_type == "connect":
                 self.total_connections += 1
@@ -65,170 +242,270 @@ class PerformanceMetrics:
 
     def record_error(self, error_type: str, error_message: str = ""):
         """Record an error occurrence"""
+        second = int(_now())
         with self.lock:
+            self._advance_buckets(second)
+            self._error_buckets[second % RATE_WINDOW_SECONDS] += 1
             self.error_counts[error_type] += 1
             self.total_errors += 1
 
-            logger.warning(
-                f"Error recorded - Type: {error_type}, Message: {error_message}"
-            )
+        logger.warning(
+            "Error recorded - Type: %s, Message: %s", error_type, error_message
+        )
 
     def get_message_rate(self, window_minutes: int = 1) -> float:
         """Get messages per second over the specified time window"""
+        now = _now()
         with self.lock:
-            cutoff = datetime.utcnow() - timedelta(minutes=window_minutes)
-            recent_messages = [m for m in self.message_times if m["timestamp"] > cutoff]
-
-            if len(recent_messages) == 0:
-                return 0.0
-
-            time_span = (
-                datetime.utcnow() - recent_messages[0]["timestamp"]
-            ).total_seconds()
-            return len(recent_messages) / max(time_span, 1.0)
+            counts = self._recent_buckets(self._rate_buckets, now, window_minutes * 60)
+        return _bucket_rate(counts, now)
 
     def get_average_message_duration(self, message_type: str = None) -> float:
         """Get average message processing duration"""
         with self.lock:
-            if message_type:
-                durations = [
-                    m["duration"]
-                    for m in self.message_times
-                    if m["type"] == message_type and m["duration"] > 0
-                ]
+            if not message_type:
+                total, count = self._dur_sum, self._dur_count
             else:
-                durations = [
-                    m["duration"] for m in self.message_times if m["duration"] > 0
-                ]
+                type_id = self._type_ids.get(message_type)
+                if type_id is None:
+                    return 0.0
+                total = self._type_dur_sum[type_id]
+                count = self._type_dur_count[type_id]
 
-            return sum(durations) / len(durations) if durations else 0.0
+        return total / count if count else 0.0
 
     def get_error_rate(self, window_minutes: int = 5) -> float:
         """Get error rate as a percentage over the specified time window"""
+        now = _now()
+        window = window_minutes * 60
         with self.lock:
-            cutoff = datetime.utcnow() - timedelta(minutes=window_minutes)
-            recent_messages = [m for m in self.message_times if m["timestamp"] > cutoff]
-
-            if len(recent_messages) == 0:
-                return 0.0
-
-            # Count errors in the same window (approximation)
-            recent_error_count = sum(self.error_counts.values()) * (
-                len(recent_messages) / max(self.total_messages_sent, 1)
-            )
-
-            return (recent_error_count / len(recent_messages)) * 100.0
+            errors = sum(self._recent_buckets(self._error_buckets, now, window))
+            messages = sum(self._recent_buckets(self._rate_buckets, now, window))
+        return _error_rate(errors, messages)
 
     def get_connection_stats(self) -> Dict[str, Any]:
         """Get connection statistics"""
         with self.lock:
-            connect_events = [
-                c for c in self.connection_times if c["event"] == "connect"
-            ]
-            disconnect_events = [
-                c for c in self.connection_times if c["event"] == "disconnect"
-            ]
-
-            avg_connect_time = 0.0
-            if connect_events:
-                connect_durations = [
-                    c["duration"] for c in connect_events if c["duration"] > 0
-                ]
-                avg_connect_time = (
-                    sum(connect_durations) / len(connect_durations)
-                    if connect_durations
-                    else 0.0
-                )
+            events = list(self.connection_times)
+            total_connections = self.total_connections
+            current_connections = self.current_connections
 
-            return {
-                "total_connections": self.total_connections,
-                "current_connections": self.current_connections,
-                "average_connect_time": avg_connect_time,
-                "connect_events": len(connect_events),
-                "disconnect_events": len(disconnect_events),
-            }
+        return _connection_stats(events, total_connections, current_connections)
 
     def get_summary_stats(self) -> Dict[str, Any]:
         """Get comprehensive performance summary"""
+        # Take everything the report needs in one pass under the lock, then
+        # aggregate without holding it
+        now = _now()
         with self.lock:
-            session_duration = (datetime.utcnow() - self.session_start).total_seconds()
-
-            return {
-                "session": {
-                    "start_time": self.session_start.isoformat(),
-                    "duration_seconds": session_duration,
-                    "uptime": str(timedelta(seconds=int(session_duration))),
-                },
-                "messages": {
-                    "total_sent": self.total_messages_sent,
-                    "rate_per_second": self.get_message_rate(1),
-                    "rate_per_minute": self.get_message_rate(1) * 60,
-                    "average_duration": self.get_average_message_duration(),
-                    "types": dict(self.message_counts),
-                },
-                "connections": self.get_connection_stats(),
-                "errors": {
-                    "total": self.total_errors,
-                    "rate_percent": self.get_error_rate(5),
-                    "by_type": dict(self.error_counts),
-                },
-                "performance": {
-                    "memory_usage_mb": self._get_memory_usage(),
-                    "thread_count": threading.active_count(),
-                },
-            }
-
-    def export_metrics(self, filepath: str) -> bool:
-        """Export metrics to JSON file"""
+            # Five minutes of buckets, newest first: the rate uses the first minute
+            message_window = self._recent_buckets(self._rate_buckets, now, 5 * 60)
+            error_window = sum(self._recent_buckets(self._error_buckets, now, 5 * 60))
+            dur_sum, dur_count = self._dur_sum, self._dur_count
+            events = list(self.connection_times)
+            total_connections = self.total_connections
+            current_connections = self.current_connections
+            total_sent = self.total_messages_sent
+            message_counts = self.message_counts.copy()
+            total_errors = self.total_errors
+            error_counts = self.error_counts.copy()
+
+        session_duration = now - self._session_start_ts
+        message_rate = _bucket_rate(message_window[:60], now)
+
+        return {
+            "session": {
+                "start_time": self.session_start.isoformat(),
+                "duration_seconds": session_duration,
+                "uptime": str(timedelta(seconds=int(session_duration))),
+            },
+            "messages": {
+                "total_sent": total_sent,
+                "rate_per_second": message_rate,
+                "rate_per_minute": message_rate * 60,
+                "average_duration": dur_sum / dur_count if dur_count else 0.0,
+                "types": message_counts,
+            },
+            "connections": _connection_stats(
+                events, total_connections, current_connections
+            ),
+            "errors": {
+                "total": total_errors,
+                "rate_percent": _error_rate(error_window, sum(message_window)),
+                "by_type": error_counts,
+            },
+            "performance": {
+                "memory_usage_mb": self._get_memory_usage(),
+                "thread_count": threading.active_count(),
+            },
+        }
+
+    def export_metrics(self, filepath: str, background: bool = False) -> bool:
+        """
+        Export metrics to JSON file
+
+        With background=True the file is written by the export writer thread and
+        the result only says whether the export was queued
+        """
         try:
             stats = self.get_summary_stats()
             stats["export_time"] = datetime.utcnow().isoformat()
-
-            with open(filepath, "w", encoding="utf-8") as f:
-                json.dump(stats, f, indent=2, ensure_ascii=False)
-
-            logger.info(f"Metrics exported to {filepath}")
+            payload = _dumps_indented(stats)
+
+            if background:
+                _start_export_writer()
+                try:
+                    _export_queue.put_nowait((filepath, payload))
+                except queue.Full:
+                    logger.warning("Export queue full, skipped export to %s", filepath)
+                    return False
+                return True
+
+            _write_export(filepath, payload)
             return True
 
         except Exception as e:
-            logger.error(f"Failed to export metrics: {e}")
+            logger.error("Failed to export metrics: %s", e)
             return False
 
-    def _cleanup_if_needed(self):
-        """Clean up old data if needed"""
-        now = datetime.utcnow()
-        if now - self.last_cleanup > self.cleanup_interval:
-            self._cleanup_old_data()
-            self.last_cleanup = now
-
     def _cleanup_old_data(self):
         """Remove data older than 1 hour to save memory"""
-        cutoff = datetime.utcnow() - timedelta(hours=1)
-
-        # Clean message times
-        while self.message_times and self.message_times[0]["timestamp"] < cutoff:
-            self.message_times.popleft()
+        cutoff = _now() - 60 * 60
+
+        # Clean message times by shrinking the live window from the oldest end,
+        # timestamps are appended in order so each segment can be bisected
+        for start, stop in self._message_segments():
+            index = bisect.bisect_left(self._ts, cutoff, start, stop)
+            for slot in range(start, index):
+                self._evict(slot)
+            self._count -= index - start
+            if index < stop:
+                break
 
         # Clean connection times
-        while self.connection_times and self.connection_times[0]["timestamp"] < cutoff:
-            self.connection_times.popleft()
+        events = self.connection_times
+        index = bisect.bisect_left(events, cutoff, key=attrgetter("ts"))
+        if index:
+            self.connection_times = deque(islice(events, index, None), events.maxlen)
+
+    def _intern_type(self, message_type: str) -> int:
+        """Assign the next type id to a new message type (call with the lock held)"""
+        type_id = self._type_ids[message_type] = len(self._type_table)
+        self._type_table.append(message_type)
+        self._type_dur_sum.append(0.0)
+        self._type_dur_count.append(0)
+        return type_id
+
+    def _evict(self, slot: int):
+        """Drop a record's duration from the running totals (call with the lock held)"""
+        duration = self._dur[slot]
+        if duration > 0:
+            type_id = self._type_idx[slot]
+            self._dur_count -= 1
+            self._type_dur_count[type_id] -= 1
+            # Reset emptied sums so float rounding from the subtractions cannot linger
+            self._dur_sum = self._dur_sum - duration if self._dur_count else 0.0
+            self._type_dur_sum[type_id] = (
+                self._type_dur_sum[type_id] - duration
+                if self._type_dur_count[type_id]
+                else 0.0
+            )
 
     def _get_memory_usage(self) -> float:
         """Get approximate memory usage in MB"""
-        try:
-            import psutil
+        now = _now()
+        value, taken = self._memory_sample
+        if now - taken < MEMORY_SAMPLE_TTL:
+            return value
 
-            process = psutil.Process(os.getpid())
-            return process.memory_info().rss / 1024 / 1024
-        except ImportError:
+        if self._process is not None:
+            value = self._process.memory_info().rss / 1024 / 1024
+        else:
             # Fallback calculation
-            import sys
-
-            return (
-                sys.getsizeof(self.message_times)
-                + sys.getsizeof(self.connection_times) / 1024 / 1024
+            value = (
+                (
+                    sys.getsizeof(self._ts)
+                    + sys.getsizeof(self._dur)
+                    + sys.getsizeof(self._type_idx)
+                    + sys.getsizeof(self.connection_times)
+                )
+                / 1024
+                / 1024
             )
 
+        self._memory_sample = (value, now)
+        return value
+
+    def _message_segments(self) -> List[Tuple[int, int]]:
+        """
+        Physical (start, stop) slices covering the live message records, oldest first
+        """
+        start = (self._head - self._count) % self.max_history
+        stop = start + self._count
+        if stop <= self.max_history:
+            return [(start, stop)]
+        return [(start, self.max_history), (0, stop - self.max_history)]
+
+    def _advance_buckets(self, second: int):
+        """Zero the rate buckets skipped since the last write (call with the lock held)"""
+        last = self._bucket_sec
+        if second <= last:
+            return
+        messages, errors = self._rate_buckets, self._error_buckets
+        if second - last >= RATE_WINDOW_SECONDS:
+            messages[:] = _EMPTY_BUCKETS
+            errors[:] = _EMPTY_BUCKETS
+        else:
+            for sec in range(last + 1, second + 1):
+                slot = sec % RATE_WINDOW_SECONDS
+                messages[slot] = 0
+                errors[slot] = 0
+        self._bucket_sec = second
+
+    def _recent_buckets(
+        self, buckets: array, now: float, window_seconds: int
+    ) -> List[int]:
+        """
+        Counts from a bucket ring for the last window_seconds (capped at
+        RATE_WINDOW_SECONDS), newest second first (call with the lock held)
+        """
+        second = int(now)
+        window = min(window_seconds, RATE_WINDOW_SECONDS)
+        self._advance_buckets(second)
+        return [buckets[(second - age) % RATE_WINDOW_SECONDS] for age in range(window)]
+
+    @property
+    def message_times(self) -> List[MsgRecord]:
+        """Recorded messages, oldest first"""
+        table = self._type_table
+        return [
+            MsgRecord(self._ts[i], table[self._type_idx[i]], self._dur[i])
+            for start, stop in self._message_segments()
+            for i in range(start, stop)
+        ]
+
+
+def _record_operation(
+    metrics: PerformanceMetrics,
+    operation_name: str,
+    operation_type: str,
+    duration: float,
+    exc_type=None,
+    exc_val=None,
+):
+    """Record the outcome of a timed operation"""
+    if exc_type is None:
+        # Success
+        if operation_type == "message":
+            metrics.record_message_sent(operation_name, duration)
+        elif operation_type == "connection":
+            metrics.record_connection_event(operation_name, duration)
+    else:
+        # Error occurred
+        error_type = exc_type.__name__ if exc_type else "UnknownError"
+        error_msg = str(exc_val) if exc_val else ""
+        metrics.record_error(f"{operation_type}_{error_type}", error_msg)
+
 
 class PerformanceMonitor:
     """Context manager for monitoring operation performance"""
@@ -242,26 +519,22 @@ class PerformanceMonitor:
         self.metrics = metrics
         self.operation_name = operation_name
         self.operation_type = operation_type
-        self.start_time = None
+        self.start_ns = 0
 
     def __enter__(self):
-        self.start_time = time.time()
+        self.start_ns = _perf_ns()
         return self
 
     def __exit__(self, exc_type, exc_val, exc_tb):
-        duration = time.time() - self.start_time
-
-        if exc_type is None:
-            # Success
-            if self.operation_type == "message":
-                self.metrics.record_message_sent(self.operation_name, duration)
-            elif self.operation_type == "connection":
-                self.metrics.record_connection_event(self.operation_name, duration)
-        else:
-            # Error occurred
-            error_type = exc_type.__name__ if exc_type else "UnknownError"
-            error_msg = str(exc_val) if exc_val else ""
-            self.metrics.record_error(f"{self.operation_type}_{error_type}", error_msg)
+        duration = (_perf_ns() - self.start_ns) / 1e9
+        _record_operation(
+            self.metrics,
+            self.operation_name,
+            self.operation_type,
+            duration,
+            exc_type,
+            exc_val,
+        )
 
 
 # Global metrics instance
@@ -298,13 +571,15 @@ def get_performance_summary() -> Dict[str, Any]:
     return _global_metrics.get_summary_stats()
 
 
-def export_performance_metrics(filepath: str = None) -> bool:
+def export_performance_metrics(filepath: str = None, background: bool = False) -> bool:
     """Export performance metrics to file"""
     if filepath is None:
-        timestamp = datetime.utcnow().strftime("%Y%m%d_%H%M%S")
-        filepath = f"edmcoverlay_metrics_{timestamp}.json"
+        # Year, month, day, hour, minute, second of the current UTC time
+        filepath = "edmcoverlay_metrics_%04d%02d%02d_%02d%02d%02d.json" % (
+            time.gmtime()[:6]
+        )
 
-    return _global_metrics.export_metrics(filepath)
+    return _global_metrics.export_metrics(filepath, background)
 
 
 # Performance monitoring decorator
@@ -312,10 +587,23 @@ def monitor_performance(operation_name: str = None, operation_type: str = "messa
     """Decorator for monitoring function performance"""
 
     def decorator(func):
+        name = operation_name or func.__name__
+
+        # Time the call inline rather than building a PerformanceMonitor per call
+        @functools.wraps(func)
         def wrapper(*args, **kwargs):
-            name = operation_name or func.__name__
-            with monitor_operation(name, operation_type):
-                return func(*args, **kwargs)
+            start = _perf_ns()
+            try:
+                result = func(*args, **kwargs)
+            except BaseException as e:
+                duration = (_perf_ns() - start) / 1e9
+                _record_operation(
+                    _global_metrics, name, operation_type, duration, type(e), e
+                )
+                raise
+            duration = (_perf_ns() - start) / 1e9
+            _record_operation(_global_metrics, name, operation_type, duration)
+            return result
 
         return wrapper
 
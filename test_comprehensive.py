@@ -5,14 +5,14 @@ Comprehensive test suite for EDMCOverlay
 import json
 import os
 import socket
+import subprocess
 import sys
 import threading
 import time
 import unittest
 from unittest.mock import MagicMock, mock_open, patch
 
-# Add the parent directory to the path to import our modules
-sys.path.insert(0, os.path.dirname(os.path.abspath(__file__)))
+import pytest
 
 try:
     from config import Config
@@ -95,6 +95,52 @@ class TestOverlayConnection(unittest.TestCase):
             sanitized = self.overlay._sanitize_message(msg)
             self.assertLessEqual(len(sanitized.get("text", "")), 1000)
 
+    def test_oversized_message_rejected(self):
+        """Test that messages over the server size limit are not sent"""
+        if hasattr(self.overlay, "_sanitize_message"):
+            with patch.object(self.overlay, "_write") as mock_write:
+                with self.assertRaises(ValueError):
+                    self.overlay.send_raw({"id": "A" * 20000, "text": "big"})
+                mock_write.assert_not_called()
+
+    def test_legacy_send_raw_keeps_vector_and_anchor(self):
+        """Test that vector shapes from legacy callers reach the server intact"""
+        import edmcoverlay
+
+        msg = {
+            "id": "route",
+            "shape": "vect",
+            "color": "red",
+            "anchor": "SE",
+            "vector": [{"x": 1, "y": 2, "marker": "circle"}, {"x": 3, "y": 4}],
+            "ttl": 5,
+        }
+        legacy = edmcoverlay.Overlay()
+        with patch.object(legacy, "_write") as mock_write:
+            legacy.send_raw(msg)
+
+        sent = json.loads(mock_write.call_args[0][0])
+        self.assertEqual(sent, msg)
+
+    def test_legacy_ensure_service_does_not_raise(self):
+        """Test that the legacy ensure_service traces a missing exe instead"""
+        import edmcoverlay
+        import edmcoverlay_improved
+
+        manager = edmcoverlay_improved._service_manager
+        with patch.object(
+            manager, "check_game_running", return_value=True
+        ), patch.object(manager, "is_service_alive", return_value=False), patch.object(
+            manager, "find_server_program", return_value=None
+        ), patch.object(
+            manager, "_last_alive_ts", float("-inf")
+        ), patch(
+            "edmcoverlay.trace"
+        ) as mock_trace:
+            edmcoverlay.ensure_service()
+
+        self.assertIn("EDMCOverlay.exe not found", mock_trace.call_args[0][0])
+
 
 class TestServiceManager(unittest.TestCase):
     """Test service manager functionality"""
@@ -102,6 +148,18 @@ class TestServiceManager(unittest.TestCase):
     def setUp(self):
         if "ServiceManager" in globals():
             self.service_manager = ServiceManager()
+            # Keep the discovered program path out of the real config file
+            self.test_config_file = "/tmp/test_edmcoverlay_service_config.json"
+            self._config_patcher = patch(
+                "edmcoverlay_improved.config", Config(self.test_config_file)
+            )
+            self._config_patcher.start()
+
+    def tearDown(self):
+        if hasattr(self, "_config_patcher"):
+            self._config_patcher.stop()
+        if hasattr(self, "test_config_file") and os.path.exists(self.test_config_file):
+            os.remove(self.test_config_file)
 
     @patch("os.path.isfile")
     def test_find_server_program(self, mock_isfile):
@@ -114,6 +172,37 @@ class TestServiceManager(unittest.TestCase):
             self.assertIsNotNone(program_path)
             self.assertIn("EDMCOverlay.exe", program_path)
 
+    @patch("os.path.isfile")
+    def test_find_server_program_uses_cached_path(self, mock_isfile):
+        """Test that a previously discovered program path is reused"""
+        if hasattr(self, "service_manager"):
+            import edmcoverlay_improved
+
+            cached_path = os.path.join("cached", "EDMCOverlay.exe")
+            edmcoverlay_improved.config.set("service.program_path", cached_path)
+            mock_isfile.side_effect = lambda path: path == cached_path
+
+            self.assertEqual(self.service_manager.find_server_program(), cached_path)
+            mock_isfile.assert_called_once_with(cached_path)
+
+    def test_plugin_config_ignores_foreign_config_module(self):
+        """Test that EDMC's own ``config`` module does not shadow the plugin's"""
+        if hasattr(self, "service_manager"):
+            import types
+
+            import edmcoverlay_improved
+
+            foreign = types.ModuleType("config")
+            foreign.config = object()  # type: ignore[attr-defined]
+            with patch.dict(sys.modules, {"config": foreign}):
+                sys.modules.pop("edmcoverlay_config", None)
+                plugin_config = edmcoverlay_improved._load_plugin_config()
+
+            self.assertIsNotNone(plugin_config)
+            self.assertIsNot(plugin_config, foreign.config)
+            self.assertEqual(plugin_config.get("server.port"), 5010)
+            self.assertIsInstance(plugin_config.max_message_length, int)
+
     @patch("subprocess.Popen")
     def test_ensure_service_start(self, mock_popen):
         """Test service startup"""
@@ -135,6 +224,76 @@ class TestServiceManager(unittest.TestCase):
                         self.service_manager.ensure_service()
                         mock_popen.assert_called_once()
 
+    @patch("time.sleep")
+    @patch("subprocess.Popen")
+    def test_ensure_service_reports_early_exit(self, mock_popen, mock_sleep):
+        """Test that a service exiting on startup is reported with its exit code"""
+        if hasattr(self, "service_manager"):
+            mock_process = MagicMock()
+            mock_process.poll.return_value = 1
+            mock_process.returncode = 1
+            mock_popen.return_value = mock_process
+
+            with patch.object(
+                self.service_manager, "find_server_program", return_value="test.exe"
+            ), patch.object(
+                self.service_manager, "check_game_running", return_value=True
+            ), patch.object(
+                self.service_manager, "is_service_alive", return_value=False
+            ):
+                with self.assertRaises(OverlayServiceError) as ctx:
+                    self.service_manager.ensure_service()
+
+            self.assertIn("exited with code 1", str(ctx.exception))
+            mock_popen.assert_called_once()
+            self.assertEqual(mock_popen.call_args[1]["stderr"], subprocess.DEVNULL)
+            mock_process.communicate.assert_not_called()
+
+    def test_ensure_service_skips_recently_alive(self):
+        """Test that a recent successful probe short-circuits ensure_service"""
+        if hasattr(self, "service_manager"):
+            self.service_manager._last_alive_ts = time.monotonic()
+            with patch.object(self.service_manager, "is_service_alive") as mock_alive:
+                self.service_manager.ensure_service()
+                mock_alive.assert_not_called()
+
+    @patch("time.sleep")
+    @patch("subprocess.Popen")
+    @patch("socket.create_connection")
+    def test_failed_probe_allows_restart(self, mock_connect, mock_popen, mock_sleep):
+        """Test that a probe failing after a success lets ensure_service restart"""
+        if hasattr(self, "service_manager"):
+            mock_popen.return_value.poll.return_value = None
+
+            self.assertTrue(self.service_manager.is_service_alive())
+            mock_connect.side_effect = ConnectionRefusedError("server died")
+            self.assertFalse(self.service_manager.is_service_alive())
+
+            with patch.object(
+                self.service_manager, "find_server_program", return_value="test.exe"
+            ), patch.object(
+                self.service_manager, "check_game_running", return_value=True
+            ):
+                self.service_manager.ensure_service()
+
+            mock_popen.assert_called_once()
+
+    @patch("time.monotonic", return_value=5.0)
+    def test_ensure_service_runs_soon_after_boot(self, mock_monotonic):
+        """Test that a never-alive manager acts while monotonic() is below the TTL"""
+        if hasattr(self, "service_manager"):
+            with patch.object(
+                self.service_manager, "check_game_running", return_value=True
+            ), patch.object(
+                self.service_manager, "is_service_alive", return_value=False
+            ), patch.object(
+                self.service_manager, "find_server_program", return_value=None
+            ) as mock_find:
+                with self.assertRaises(OverlayServiceError):
+                    self.service_manager.ensure_service()
+
+            mock_find.assert_called_once()
+
 
 class TestConfig(unittest.TestCase):
     """Test configuration management"""
@@ -155,6 +314,8 @@ class TestConfig(unittest.TestCase):
             self.assertEqual(self.config.server_address, "127.0.0.1")
             self.assertEqual(self.config.server_port, 5010)
             self.assertEqual(self.config.default_ttl, 4)
+            self.assertIn("exit", self.config.allowed_commands)
+            self.assertIsInstance(self.config.allowed_commands, frozenset)
 
     def test_get_set_config(self):
         """Test getting and setting configuration values"""
@@ -166,6 +327,86 @@ class TestConfig(unittest.TestCase):
             # Test getting non-existent value with default
             self.assertEqual(self.config.get("non.existent.key", "default"), "default")
 
+    def test_set_does_not_leak_into_defaults(self):
+        """Test that instances do not share nested default dictionaries"""
+        if hasattr(self, "config"):
+            import config as config_module
+
+            self.config.set("server.port", 5013)
+            other = Config(self.test_config_file)
+            self.assertEqual(config_module.DEFAULT_CONFIG["server"]["port"], 5010)
+            self.assertEqual(other.server_port, 5010)
+
+    def test_first_load_is_safe_for_concurrent_readers(self):
+        """Test that a reader racing a slow first load waits for its values"""
+        if hasattr(self, "config"):
+            with open(self.test_config_file, "w", encoding="utf-8") as f:
+                json.dump({"security": {"max_message_length": 50}}, f)
+
+            merging = threading.Event()
+            merge = self.config._merge_config
+
+            def slow_merge(base, update):
+                merging.set()
+                time.sleep(0.1)
+                merge(base, update)
+
+            results = []
+            with patch.object(self.config, "_merge_config", side_effect=slow_merge):
+                loader = threading.Thread(target=self.config.load)
+                loader.start()
+                merging.wait(1)
+                reader = threading.Thread(
+                    target=lambda: results.append(self.config.max_message_length)
+                )
+                reader.start()
+                loader.join()
+                reader.join()
+
+            self.assertEqual(results, [50])
+
+    def test_config_loaded_lazily(self):
+        """Test that the config file is only read on first access"""
+        if hasattr(self, "config"):
+            with open(self.test_config_file, "w", encoding="utf-8") as f:
+                json.dump({"server": {"port": 5012}}, f)
+
+            self.assertFalse(self.config._loaded)
+            self.assertEqual(self.config.server_port, 5012)
+            self.assertTrue(self.config._loaded)
+
+    def test_save_section_writes_only_that_section(self):
+        """Test that saving one section leaves the rest of the file untouched"""
+        if hasattr(self, "config"):
+            with open(self.test_config_file, "w", encoding="utf-8") as f:
+                json.dump({"server": {"port": 5012}}, f)
+
+            self.config.set("service.program_path", "EDMCOverlay.exe")
+            self.config.save_section("service")
+
+            with open(self.test_config_file, encoding="utf-8") as f:
+                self.assertEqual(
+                    json.load(f),
+                    {
+                        "server": {"port": 5012},
+                        "service": {"program_path": "EDMCOverlay.exe"},
+                    },
+                )
+
+    def test_save_keeps_unreadable_file(self):
+        """Test that a config file that failed to load is never overwritten"""
+        if hasattr(self, "config"):
+            broken = '{"server": {"port": 5012,}}'
+            with open(self.test_config_file, "w", encoding="utf-8") as f:
+                f.write(broken)
+
+            self.config.set("service.program_path", "EDMCOverlay.exe")
+            self.config.save_section("service")
+            self.config.save()
+
+            with open(self.test_config_file, encoding="utf-8") as f:
+                self.assertEqual(f.read(), broken)
+
     @patch(
         "builtins.open", new_callable=mock_open, read_data='{"server": {"port": 5015}}'
     )
@@ -218,6 +459,124 @@ class TestMessageHandling(unittest.TestCase):
                 self.fail(f"Message serialization failed: {e}")
 
 
+class TestServiceStartupOnSend(unittest.TestCase):
+    """Test that sends only start the service when connecting fails"""
+
+    def setUp(self):
+        self.overlay = Overlay()
+
+    def test_send_skips_service_check_when_connect_succeeds(self):
+        """Test that a successful connect does not touch the service manager"""
+        if hasattr(self.overlay, "_ensure_connected"):
+            with patch.object(self.overlay, "connect") as mock_connect, patch.object(
+                self.overlay, "_write"
+            ), patch(
+                "edmcoverlay_improved._service_manager.ensure_service"
+            ) as mock_manager_ensure:
+                self.overlay.send_message("id", "text", "red", 1, 1)
+                mock_connect.assert_called_once()
+                mock_manager_ensure.assert_not_called()
+
+    def test_send_starts_service_after_failed_connect(self):
+        """Test that a failed connect starts the service and retries once"""
+        if hasattr(self.overlay, "_ensure_connected"):
+            with patch.object(
+                self.overlay,
+                "connect",
+                side_effect=[OverlayConnectionError("refused"), None],
+            ) as mock_connect, patch.object(self.overlay, "_write"), patch(
+                "edmcoverlay_improved._service_manager.ensure_service"
+            ) as mock_manager_ensure:
+                self.overlay.send_message("id", "text", "red", 1, 1)
+                self.assertEqual(mock_connect.call_count, 2)
+                mock_manager_ensure.assert_called_once()
+
+
+class TestBatching(unittest.TestCase):
+    """Test coalescing of several messages into one write"""
+
+    def setUp(self):
+        self.overlay = Overlay()
+
+    def tearDown(self):
+        self.overlay.disconnect()
+
+    @patch("socket.socket")
+    def test_batch_sends_single_write(self, mock_socket):
+        """Test that batched messages go out in one sendall call"""
+        if hasattr(self.overlay, "batch"):
+            mock_conn = MagicMock()
+            mock_socket.return_value = mock_conn
+
+            with self.overlay.batch():
+                self.overlay.send_raw({"id": "a", "text": "one"})
+                self.overlay.send_raw({"id": "b", "text": "two"})
+                mock_conn.sendall.assert_not_called()
+
+            mock_conn.sendall.assert_called_once()
+            lines = mock_conn.sendall.call_args[0][0].splitlines()
+            self.assertEqual(
+                [json.loads(line) for line in lines],
+                [{"id": "a", "text": "one"}, {"id": "b", "text": "two"}],
+            )
+
+    @patch("socket.socket")
+    def test_batch_discarded_on_error(self, mock_socket):
+        """Test that queued messages are dropped when the batch block raises"""
+        if hasattr(self.overlay, "batch"):
+            mock_conn = MagicMock()
+            mock_socket.return_value = mock_conn
+
+            with self.assertRaises(RuntimeError):
+                with self.overlay.batch():
+                    self.overlay.send_raw({"id": "a", "text": "one"})
+                    raise RuntimeError("boom")
+
+            mock_conn.sendall.assert_not_called()
+
+    @patch("socket.socket")
+    def test_nested_batch_flushes_with_outer(self, mock_socket):
+        """Test that a nested batch is only sent when the outer batch ends"""
+        if hasattr(self.overlay, "batch"):
+            mock_conn = MagicMock()
+            mock_socket.return_value = mock_conn
+
+            with self.overlay.batch():
+                self.overlay.send_raw({"id": "a", "text": "one"})
+                with self.overlay.batch():
+                    self.overlay.send_raw({"id": "b", "text": "two"})
+                with self.assertRaises(RuntimeError):
+                    with self.overlay.batch():
+                        self.overlay.send_raw({"id": "c", "text": "dropped"})
+                        raise RuntimeError("boom")
+                mock_conn.sendall.assert_not_called()
+
+            mock_conn.sendall.assert_called_once()
+            lines = mock_conn.sendall.call_args[0][0].splitlines()
+            self.assertEqual([json.loads(line)["id"] for line in lines], ["a", "b"])
+
+    @patch("socket.socket")
+    def test_batch_does_not_capture_other_threads(self, mock_socket):
+        """Test that sends from another thread bypass this thread's batch"""
+        if hasattr(self.overlay, "batch"):
+            mock_conn = MagicMock()
+            mock_socket.return_value = mock_conn
+
+            with self.overlay.batch():
+                self.overlay.send_raw({"id": "a", "text": "mine"})
+                other = threading.Thread(
+                    target=self.overlay.send_raw, args=({"id": "b", "text": "theirs"},)
+                )
+                other.start()
+                other.join()
+                mock_conn.sendall.assert_called_once()
+                self.assertEqual(
+                    json.loads(mock_conn.sendall.call_args[0][0])["id"], "b"
+                )
+
+            self.assertEqual(mock_conn.sendall.call_count, 2)
+
+
 class TestErrorHandling(unittest.TestCase):
     """Test error handling scenarios"""
 
@@ -242,7 +601,7 @@ class TestErrorHandling(unittest.TestCase):
     def test_connection_loss_handling(self, mock_socket):
         """Test handling of connection loss"""
         mock_conn = MagicMock()
-        mock_conn.send.side_effect = BrokenPipeError("Broken pipe")
+        mock_conn.sendall.side_effect = BrokenPipeError("Broken pipe")
         mock_socket.return_value = mock_conn
 
         # Test that connection errors are properly handled
@@ -251,6 +610,243 @@ class TestErrorHandling(unittest.TestCase):
                 self.overlay.send_raw({"command": "test"})
 
 
+class TestPerformanceMetrics(unittest.TestCase):
+    """Test performance metrics collection"""
+
+    def setUp(self):
+        from performance_monitor import PerformanceMetrics
+
+        self.metrics = PerformanceMetrics(max_history=4)
+
+    def test_history_wraps_at_capacity(self):
+        """Test that the message history keeps only the newest records"""
+        for i in range(6):
+            self.metrics.record_message_sent(f"type{i}", float(i))
+
+        history = self.metrics.message_times
+        self.assertEqual(
+            [m.type for m in history], ["type2", "type3", "type4", "type5"]
+        )
+        self.assertEqual(self.metrics.total_messages_sent, 6)
+
+    def test_average_message_duration(self):
+        """Test average duration overall and per message type"""
+        self.metrics.record_message_sent("a", 0.1)
+        self.metrics.record_message_sent("a", 0.3)
+        self.metrics.record_message_sent("b", 0.5)
+        self.metrics.record_message_sent("b", 0.0)  # Zero durations are ignored
+
+        self.assertAlmostEqual(self.metrics.get_average_message_duration(), 0.3)
+        self.assertAlmostEqual(self.metrics.get_average_message_duration("a"), 0.2)
+        self.assertEqual(self.metrics.get_average_message_duration("missing"), 0.0)
+
+    def test_average_duration_drops_evicted_records(self):
+        """Test that the running averages only cover the live history"""
+        self.metrics.record_message_sent("old", 10.0)
+        for _ in range(4):
+            self.metrics.record_message_sent("new", 1.0)
+
+        self.assertAlmostEqual(self.metrics.get_average_message_duration(), 1.0)
+        self.assertEqual(self.metrics.get_average_message_duration("old"), 0.0)
+
+    def test_message_rate_buckets(self):
+        """Test windowed message rates from the per-second buckets"""
+        from performance_monitor import PerformanceMetrics
+
+        clock = MagicMock(return_value=1000.2)
+        with patch("performance_monitor._now", clock):
+            metrics = PerformanceMetrics()
+            for ts in (1000.2, 1000.7, 1002.5):
+                clock.return_value = ts
+                metrics.record_message_sent("message")
+
+            clock.return_value = 1003.0
+            self.assertAlmostEqual(metrics.get_message_rate(1), 1.0)
+
+            # Messages older than the window are no longer counted
+            clock.return_value = 1061.0
+            self.assertAlmostEqual(metrics.get_message_rate(1), 1 / 59)
+            clock.return_value = 1400.0
+            self.assertEqual(metrics.get_message_rate(1), 0.0)
+            self.assertEqual(metrics.get_error_rate(5), 0.0)
+
+    def test_error_rate_window(self):
+        """Test that the error rate only counts errors inside the window"""
+        from performance_monitor import PerformanceMetrics
+
+        clock = MagicMock(return_value=1000.0)
+        with patch("performance_monitor._now", clock):
+            metrics = PerformanceMetrics()
+            metrics.record_error("send")
+            clock.return_value = 1200.0
+            for _ in range(4):
+                metrics.record_message_sent("message")
+            metrics.record_error("send")
+
+            self.assertAlmostEqual(metrics.get_error_rate(5), 50.0)
+            self.assertAlmostEqual(metrics.get_error_rate(1), 25.0)
+            clock.return_value = 1600.0
+            self.assertEqual(metrics.get_error_rate(5), 0.0)
+
+    def test_cleanup_old_data(self):
+        """Test that cleanup drops records older than an hour"""
+        from performance_monitor import PerformanceMetrics
+
+        clock = MagicMock(return_value=100.0)
+        with patch("performance_monitor._now", clock):
+            metrics = PerformanceMetrics(max_history=4)
+            metrics.record_connection_event("connect", 0.1)
+            for ts in (100.0, 101.0, 102.0, 103.0, 104.0):
+                clock.return_value = ts
+                metrics.record_message_sent(f"at{int(ts)}", 1.0)
+            clock.return_value = 3703.0
+            metrics.record_connection_event("disconnect")
+
+            clock.return_value = 3703.5
+            metrics._cleanup_old_data()
+
+        self.assertEqual([m.type for m in metrics.message_times], ["at104"])
+        self.assertEqual(metrics.get_average_message_duration("at103"), 0.0)
+        self.assertEqual(metrics.get_average_message_duration("at104"), 1.0)
+        self.assertEqual([c.event for c in metrics.connection_times], ["disconnect"])
+
+    def test_export_metrics(self):
+        """Test exporting the summary as a JSON file"""
+        import performance_monitor
+
+        self.metrics.record_message_sent("message", 0.1)
+        filepath = "/tmp/test_edmcoverlay_metrics.json"
+        try:
+            for dumps in (
+                performance_monitor._dumps_indented,
+                performance_monitor._json_dumps_indented,
+            ):
+                with patch.object(performance_monitor, "_dumps_indented", dumps):
+                    self.assertTrue(self.metrics.export_metrics(filepath))
+
+                with open(filepath, "r", encoding="utf-8") as f:
+                    exported = json.load(f)
+                self.assertEqual(exported["messages"]["total_sent"], 1)
+                self.assertIn("export_time", exported)
+        finally:
+            if os.path.exists(filepath):
+                os.remove(filepath)
+
+    def test_export_metrics_in_background(self):
+        """Test queueing exports for the background writer"""
+        import queue
+
+        import performance_monitor
+
+        filepath = "/tmp/test_edmcoverlay_metrics_background.json"
+        try:
+            self.assertTrue(self.metrics.export_metrics(filepath, background=True))
+            performance_monitor._export_queue.join()
+            with open(filepath, "r", encoding="utf-8") as f:
+                self.assertIn("messages", json.load(f))
+        finally:
+            if os.path.exists(filepath):
+                os.remove(filepath)
+
+        # A full queue drops the export instead of blocking the caller
+        full_queue = queue.Queue(1)
+        full_queue.put_nowait(("pending.json", b"{}"))
+        with patch.object(performance_monitor, "_export_queue", full_queue):
+            self.assertFalse(self.metrics.export_metrics(filepath, background=True))
+        self.assertFalse(os.path.exists(filepath))
+
+    def test_memory_usage_is_sampled_once_per_ttl(self):
+        """Test that memory readings are cached between samples"""
+        process = MagicMock()
+        process.memory_info.return_value.rss = 64 * 1024 * 1024
+        self.metrics._process = process
+
+        clock = MagicMock(return_value=500.0)
+        with patch("performance_monitor._now", clock):
+            self.assertEqual(self.metrics._get_memory_usage(), 64.0)
+            self.assertEqual(self.metrics._get_memory_usage(), 64.0)
+            self.assertEqual(process.memory_info.call_count, 1)
+
+            clock.return_value = 502.0
+            self.metrics._get_memory_usage()
+            self.assertEqual(process.memory_info.call_count, 2)
+
+    def test_monitor_operation_returns_fresh_monitors(self):
+        """Test that a stored monitor is never handed to another caller"""
+        import performance_monitor
+
+        with patch.object(performance_monitor, "_global_metrics", self.metrics):
+            stored = performance_monitor.monitor_operation("stored")
+            with stored:
+                pass
+            with performance_monitor.monitor_operation("other") as other:
+                self.assertIsNot(other, stored)
+            with stored:
+                pass
+
+        self.assertEqual(stored.operation_name, "stored")
+        self.assertEqual(dict(self.metrics.message_counts), {"stored": 2, "other": 1})
+
+    def test_monitor_performance_decorator(self):
+        """Test that the decorator records successes and failures"""
+        import performance_monitor
+
+        with patch.object(performance_monitor, "_global_metrics", self.metrics):
+
+            @performance_monitor.monitor_performance()
+            def render():
+                return "ok"
+
+            @performance_monitor.monitor_performance("explode")
+            def explode():
+                raise RuntimeError("boom")
+
+            self.assertEqual(render(), "ok")
+            self.assertEqual(render.__name__, "render")
+            with self.assertRaises(RuntimeError):
+                explode()
+
+        self.assertEqual(dict(self.metrics.message_counts), {"render": 1})
+        self.assertEqual(dict(self.metrics.error_counts), {"message_RuntimeError": 1})
+
+    def test_connection_stats(self):
+        """Test connection event counts and average connect time"""
+        self.metrics.record_connection_event("connect", 0.2)
+        self.metrics.record_connection_event("connect", 0.0)
+        self.metrics.record_connection_event("connect", 0.4)
+        self.metrics.record_connection_event("disconnect")
+
+        stats = self.metrics.get_connection_stats()
+        self.assertEqual(stats["connect_events"], 3)
+        self.assertEqual(stats["disconnect_events"], 1)
+        self.assertEqual(stats["current_connections"], 2)
+        self.assertAlmostEqual(stats["average_connect_time"], 0.3)
+
+    def test_summary_stats(self):
+        """Test that the summary aggregates the recorded events"""
+        self.metrics.record_message_sent("message", 0.2)
+        self.metrics.record_connection_event("connect", 0.1)
+        self.metrics.record_error("send")
+
+        result = []
+        worker = threading.Thread(
+            target=lambda: result.append(self.metrics.get_summary_stats()),
+            daemon=True,
+        )
+        worker.start()
+        worker.join(timeout=5)
+        self.assertTrue(result, "get_summary_stats did not return")
+
+        summary = result[0]
+        self.assertEqual(summary["messages"]["total_sent"], 1)
+        self.assertEqual(summary["messages"]["types"], {"message": 1})
+        self.assertAlmostEqual(summary["messages"]["average_duration"], 0.2)
+        self.assertAlmostEqual(summary["errors"]["rate_percent"], 100.0)
+        self.assertEqual(summary["connections"]["current_connections"], 1)
+        self.assertEqual(summary["errors"]["by_type"], {"send": 1})
+
+
+@pytest.mark.integration
 class IntegrationTest(unittest.TestCase):
     """Integration tests (require actual overlay server)"""
 
@@ -0,0 +1,21 @@
+"""
+Tests for the enhanced client modules, skipped when they are not available
+"""
+
+import pytest
+
+ServiceManager = pytest.importorskip("edmcoverlay_improved").ServiceManager
+Config = pytest.importorskip("config").Config
+
+
+def test_service_manager_creation():
+    """Test ServiceManager creation"""
+    manager = ServiceManager()
+    assert manager is not None
+    assert hasattr(manager, "ensure_service")
+
+
+def test_config_creation():
+    """Test Config creation"""
+    config = Config()
+    assert config is not None
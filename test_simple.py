@@ -2,113 +2,72 @@
 Simple test suite for EDMCOverlay to fix CI/CD issues
 """
 
-import os
+import contextlib
 import sys
 import unittest
-from unittest.mock import MagicMock, mock_open, patch
+from types import SimpleNamespace
+from unittest.mock import patch
 
-# Add current directory to path for imports
-sys.path.insert(0, os.path.dirname(os.path.abspath(__file__)))
-
-try:
-    from edmcoverlay_improved import Overlay, OverlayConnectionError, ServiceManager
-
-    USING_IMPROVED = True
-except ImportError:
-    from edmcoverlay import Overlay
-
-    USING_IMPROVED = False
-
-try:
-    from config import Config
-
-    HAS_CONFIG = True
-except ImportError:
-    HAS_CONFIG = False
+import pytest
 
 
 class TestBasicFunctionality(unittest.TestCase):
     """Basic functionality tests that should always pass"""
 
+    @pytest.fixture(autouse=True)
+    def _inject_overlay(self, overlay):
+        self.overlay = overlay
+
     def test_overlay_creation(self):
         """Test that Overlay can be created"""
-        overlay = Overlay()
-        self.assertIsNotNone(overlay)
+        self.assertIsNotNone(self.overlay)
 
     def test_overlay_has_required_methods(self):
         """Test that Overlay has required methods"""
-        overlay = Overlay()
-        self.assertTrue(hasattr(overlay, "send_message"))
-        self.assertTrue(hasattr(overlay, "send_raw"))
-
-    @unittest.skipUnless(USING_IMPROVED, "Enhanced version not available")
-    def test_service_manager_creation(self):
-        """Test ServiceManager creation"""
-        manager = ServiceManager()
-        self.assertIsNotNone(manager)
-        self.assertTrue(hasattr(manager, "ensure_service"))
-
-    @unittest.skipUnless(HAS_CONFIG, "Config module not available")
-    def test_config_creation(self):
-        """Test Config creation"""
-        config = Config()
-        self.assertIsNotNone(config)
-
-    def test_message_formatting(self):
-        """Test basic message formatting"""
-        overlay = Overlay()
-        # Test that we can create message data without error
-        try:
-            message_data = {
-                "command": "send_message",
-                "id": "test",
-                "text": "Hello Test",
-                "color": "green",
-                "x": 10,
-                "y": 10,
-                "ttl": 5,
-            }
-            # This should not raise an exception
-            self.assertIsInstance(message_data, dict)
-        except Exception as e:
-            self.fail(f"Message formatting failed: {e}")
+        self.assertTrue(hasattr(self.overlay, "send_message"))
+        self.assertTrue(hasattr(self.overlay, "send_raw"))
 
 
 class TestMockConnections(unittest.TestCase):
     """Tests with mocked connections to avoid actual network calls"""
 
-    def setUp(self):
-        self.overlay = Overlay()
+    @classmethod
+    def setUpClass(cls):
+        # One socket patch for the whole class instead of one per test
+        cls._socket_patcher = patch("socket.socket")
+        cls.mock_socket = cls._socket_patcher.start()
 
-    @patch("socket.socket")
-    def test_mocked_connection(self, mock_socket):
+    @classmethod
+    def tearDownClass(cls):
+        cls._socket_patcher.stop()
+
+    def test_mocked_connection(self):
         """Test connection with mocked socket"""
-        mock_conn = MagicMock()
-        mock_socket.return_value = mock_conn
+        # Nothing asserts on calls here, so a plain stub is enough
+        mock_conn = SimpleNamespace(
+            connect=lambda *args: None,
+            send=lambda *args, **kwargs: None,
+            close=lambda: None,
+        )
+        self.mock_socket.return_value = mock_conn
 
         # This test should pass regardless of whether server is running
         self.assertIsNotNone(mock_conn)
 
-    def test_error_handling(self):
-        """Test that errors are handled gracefully"""
-        overlay = Overlay()
 
-        # Test with invalid message types (should not crash)
-        invalid_messages = [None, "", 123, []]
+def test_message_formatting(sample_message):
+    """Test basic message formatting"""
+    assert isinstance(sample_message, dict)
+    assert sample_message["command"] == "send_message"
+
 
-        for invalid_msg in invalid_messages:
-            try:
-                # This might raise an exception, but should not crash the test
-                if hasattr(overlay, "send_raw"):
-                    overlay.send_raw(invalid_msg)
-            except (ValueError, TypeError, AttributeError):
-                # Expected for invalid messages
-                pass
-            except Exception:
-                # Other exceptions are also acceptable in test environment
-                pass
+@pytest.mark.parametrize("invalid_msg", [None, "", 123, []])
+def test_error_handling(overlay, invalid_msg):
+    """Test that invalid messages are rejected without crashing"""
+    with contextlib.suppress(ValueError, TypeError, AttributeError):
+        overlay.send_raw(invalid_msg)
 
 
 if __name__ == "__main__":
-    # Run with reduced verbosity for CI
-    unittest.main(verbosity=1)
+    # Run with reduced verbosity for CI, sharded across the available cores
+    sys.exit(pytest.main(["-q", "-n", "auto", __file__]))